@@ -3,6 +3,7 @@
 # Render sẽ chạy script này trước khi start server
 
 echo "Khởi tạo database..."
-python -c "from models.database import init_db; init_db(); print('Database đã sẵn sàng!')"
+# Tạo bảng còn thiếu và nâng cấp index của database đã có (chạy lại nhiều lần vẫn an toàn)
+python -m scripts.migrate_history_indexes
 
 echo "Build hoàn thành!"
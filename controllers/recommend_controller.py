@@ -1,15 +1,46 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+import gzip
+import json
+import math
+import re
+import uuid
+
+from flask import Blueprint, Response, g, jsonify, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson là tùy chọn
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli là tùy chọn
+    brotli = None
 
 from models.data_loader import ensure_processed_data
-from models.vectorizer import build_vectorizer, transform_query
-from models.recommender import ContentRecommender
+from models.vectorizer import build_vectorizer
+from models.embeddings import ensure_embeddings
+from models.recommender import ContentRecommender, RESULT_FIELDS, RETRIEVAL_MODES
+from models.ttl_cache import TTLCache
 from models.user_history import UserHistory
 from models import metrics
 
 recommend_bp = Blueprint("recommend", __name__)
 
+USER_ID_HEADER = "X-User-Id"
+USER_ID_COOKIE = "user_id"
+USER_ID_MAX_AGE = 365 * 24 * 3600
+# Khớp với độ dài cột user_id trong database
+_USER_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
+
+MAX_TOP_K = 500
+# Chỉ nén response lớn hơn ngưỡng này (byte)
+COMPRESS_MIN_BYTES = 1024
+
+# Danh sách xếp hạng (indices, scores) theo (query, mode, top_k, diversity) để phân trang
+_ranking_cache = TTLCache(max_entries=256, ttl=60.0)
+
 
 _recommender: ContentRecommender | None = None
 
@@ -21,10 +52,79 @@ def _load_artifacts() -> ContentRecommender:
 
     df = ensure_processed_data()
     vectorizer, matrix = build_vectorizer(df["combined_text"].tolist())
-    _recommender = ContentRecommender(df=df, vectorizer=vectorizer, matrix=matrix)
+    dense_index = ensure_embeddings(vectorizer, matrix)
+    _recommender = ContentRecommender(df=df, vectorizer=vectorizer, matrix=matrix, dense_index=dense_index)
     return _recommender
 
 
+def _resolve_user_id() -> tuple[str, bool]:
+    """Lấy user_id từ header hoặc cookie; tạo mới nếu thiếu/không hợp lệ."""
+    for candidate in (request.headers.get(USER_ID_HEADER), request.cookies.get(USER_ID_COOKIE)):
+        if candidate and _USER_ID_RE.match(candidate):
+            return candidate, False
+    return uuid.uuid4().hex, True
+
+
+@recommend_bp.before_request
+def _load_user():
+    g.user_id, g.new_user = _resolve_user_id()
+
+
+@recommend_bp.after_request
+def _persist_user(response):
+    if g.get("new_user"):
+        response.set_cookie(
+            USER_ID_COOKIE,
+            g.user_id,
+            max_age=USER_ID_MAX_AGE,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+def _json_response(payload, status: int = 200) -> Response:
+    """Serialize JSON (orjson nếu có) và nén br/gzip theo Accept-Encoding."""
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    response = Response(body, status=status, mimetype="application/json")
+    accepted = request.headers.get("Accept-Encoding", "")
+    if len(body) >= COMPRESS_MIN_BYTES:
+        if brotli is not None and "br" in accepted:
+            response.set_data(brotli.compress(body, quality=4))
+            response.headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            response.set_data(gzip.compress(body, compresslevel=5))
+            response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _parse_fields(raw) -> tuple[str, ...] | None:
+    """`fields` dạng list hoặc chuỗi "id,title"; None nếu có trường không hợp lệ."""
+    if raw is None:
+        return RESULT_FIELDS
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    if not isinstance(raw, list):
+        return None
+    fields = tuple(dict.fromkeys(str(f).strip() for f in raw if str(f).strip()))
+    if not fields or any(f not in RESULT_FIELDS for f in fields):
+        return None
+    return fields
+
+
+def _parse_int(value, default: int, lower: int, upper: int) -> int:
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = default
+    return max(lower, min(value, upper))
+
+
 @recommend_bp.route("/api/health", methods=["GET"])
 def health():
     return jsonify({"status": "ok"})
@@ -35,24 +135,53 @@ def recommend():
     payload = request.get_json(silent=True) or {}
     query = payload.get("query", "").strip()
     top_k = payload.get("top_k", 10)
+    mode = payload.get("mode", "tfidf")
 
     if not query:
         return jsonify({"error": "Vui lòng nhập từ khóa hoặc mô tả"}), 400
+    if mode not in RETRIEVAL_MODES:
+        return jsonify({"error": f"mode phải là một trong: {', '.join(RETRIEVAL_MODES)}"}), 400
+
+    fields = _parse_fields(payload.get("fields"))
+    if fields is None:
+        return jsonify({"error": f"fields chỉ gồm: {', '.join(RESULT_FIELDS)}"}), 400
 
     try:
-        top_k = int(top_k)
+        diversity = float(payload.get("diversity", 0.0))
     except (TypeError, ValueError):
-        top_k = 10
+        diversity = 0.0
+    diversity = min(max(diversity, 0.0), 1.0) if math.isfinite(diversity) else 0.0
+
+    top_k = _parse_int(top_k, default=10, lower=1, upper=MAX_TOP_K)
+    offset = _parse_int(payload.get("offset", 0), default=0, lower=0, upper=top_k)
+    limit = _parse_int(payload.get("limit", top_k), default=top_k, lower=1, upper=top_k)
 
     recommender = _load_artifacts()
-    query_vec = transform_query(recommender.vectorizer, query)
-    results = recommender.recommend_by_query(query_vec=query_vec, top_k=top_k)
-    
-    # Lưu lịch sử tìm kiếm
-    history = UserHistory()
-    history.add_search(query=query, top_k=top_k, result_count=len(results))
-    
-    return jsonify({"results": results})
+    cache_key = (query, mode, top_k, diversity)
+    ranking = _ranking_cache.get(cache_key)
+    if ranking is None:
+        query_vec = recommender.query_encoder.encode(query)
+        ranking = recommender.rank(query_vec=query_vec, top_k=top_k, mode=mode, diversity=diversity)
+        _ranking_cache.set(cache_key, ranking)
+
+    top_indices, top_scores = ranking
+    total = len(top_indices)
+    page_end = min(offset + limit, total)
+    results = recommender.build_results(top_indices[offset:page_end], top_scores[offset:page_end], fields=fields)
+
+    # Lưu lịch sử tìm kiếm (chỉ trang đầu, tránh ghi lại mỗi lần lật trang)
+    if offset == 0:
+        history = UserHistory(g.user_id)
+        history.add_search(query=query, top_k=top_k, result_count=total)
+
+    return _json_response(
+        {
+            "results": results,
+            "total": total,
+            "offset": offset,
+            "next_offset": page_end if page_end < total else None,
+        }
+    )
 
 
 @recommend_bp.route("/api/stats", methods=["GET"])
@@ -65,7 +194,7 @@ def stats():
     top_items = metrics.top_items(df, top_n=8)
     heatmap = metrics.similarity_heatmap(df, recommender.matrix, top_n=10)
 
-    return jsonify(
+    return _json_response(
         {
             "rating_distribution": rating_dist,
             "genre_counts": genre_counts,
@@ -78,10 +207,8 @@ def stats():
 @recommend_bp.route("/api/history", methods=["GET"])
 def get_history():
     """Lấy lịch sử tìm kiếm và xem phim."""
-    history = UserHistory()
-    searches = history.get_searches(limit=10)
-    views = history.get_views(limit=10)
-    return jsonify({"searches": searches, "views": views})
+    history = UserHistory(g.user_id)
+    return jsonify(history.get_recent(limit=10))
 
 
 @recommend_bp.route("/api/history/view", methods=["POST"])
@@ -96,7 +223,7 @@ def add_view():
     if not movie_id or not title:
         return jsonify({"error": "Thiếu thông tin phim"}), 400
     
-    history = UserHistory()
+    history = UserHistory(g.user_id)
     history.add_view(movie_id=movie_id, title=title, genres=genres, rating=float(rating))
     return jsonify({"status": "ok"})
 
@@ -104,6 +231,6 @@ def add_view():
 @recommend_bp.route("/api/history/clear", methods=["POST"])
 def clear_history():
     """Xóa toàn bộ lịch sử."""
-    history = UserHistory()
+    history = UserHistory(g.user_id)
     history.clear_history()
     return jsonify({"status": "ok"})
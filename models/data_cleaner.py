@@ -6,8 +6,12 @@ import unicodedata
 import numpy as np
 import pandas as pd
 
+from models.dedup import find_near_duplicates, jaccard_similarity
 
 TEXT_COLS = ["original_title", "overview", "genre", "original_language"]
+# Jaccard tiêu đề (shingle ký tự) dưới ngưỡng này coi như tên khác hẳn (tên
+# thay thế / bản dịch); ở giữa hai ngưỡng là cùng series (Part 2, Black/White...)
+ALT_TITLE_MAX_SIMILARITY = 0.2
 
 
 def _normalize_text(text: str) -> str:
@@ -60,6 +64,65 @@ def _drop_duplicates(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop_duplicates()
 
 
+def _dedup_text(df: pd.DataFrame, cols: list[str]) -> list[str]:
+    """Văn bản thô (chỉ lowercase + gộp khoảng trắng) - giữ ký tự không phải ASCII
+    như tiêu đề tiếng Nhật, vốn bị _normalize_text xóa hết."""
+    parts = [df[col].fillna("").astype(str) for col in cols if col in df.columns]
+    if not parts:
+        return [""] * len(df)
+    text = parts[0]
+    for part in parts[1:]:
+        text = text + " " + part
+    return text.str.lower().str.split().str.join(" ").tolist()
+
+
+def _drop_near_duplicates(df: pd.DataFrame, threshold: float = 0.8) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Gộp các cụm phim gần trùng, giữ dòng đầu tiên.
+
+    Ứng viên tìm bằng MinHash/LSH trên tiêu đề + overview thô, rồi xét tiêu đề:
+    - gần trùng (>= threshold): gộp bất kể năm - bản phát hành lại, bản copy;
+    - khác hẳn (< ALT_TITLE_MAX_SIMILARITY): gộp nếu cùng năm - tên thay thế;
+    - giống một phần: không gộp - phần tiếp theo / phim anh em trong series
+      thường dùng chung overview (寄生獣 / 寄生獣 完結編).
+    Trả về (df đã lọc, report) - report ghi lại mỗi dòng bị loại, dòng được giữ
+    và Jaccard giữa đúng hai dòng đó.
+    """
+    title_col = "original_title" if "original_title" in df.columns else "title"
+    titles = df[title_col].astype(str).to_numpy() if title_col in df.columns else np.full(len(df), "")
+    texts = _dedup_text(df, [title_col, "overview" if "overview" in df.columns else "description"])
+    # Shingle theo ký tự để so được cả tiêu đề không tách từ (CJK)
+    title_chars = [" ".join(t) for t in _dedup_text(df, [title_col])]
+    if "release_date" in df.columns:
+        years = pd.to_datetime(df["release_date"], errors="coerce").dt.year.to_numpy()
+    elif "year" in df.columns:
+        years = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    else:
+        years = np.full(len(df), np.nan)
+
+    def accept(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        same_year = (years[left] == years[right]) | np.isnan(years[left]) | np.isnan(years[right])
+        title_similarity = jaccard_similarity([title_chars[i] for i in left], [title_chars[i] for i in right])
+        return (title_similarity >= threshold) | (same_year & (title_similarity < ALT_TITLE_MAX_SIMILARITY))
+
+    labels, _ = find_near_duplicates(texts, threshold=threshold, accept=accept)
+    positions = pd.Series(np.arange(len(df)))
+    keeper = positions.groupby(labels).transform("min").to_numpy()
+    dropped = np.flatnonzero(keeper != positions.to_numpy())
+
+    report = pd.DataFrame(
+        {
+            "kept_index": df.index[keeper[dropped]],
+            "kept_title": titles[keeper[dropped]],
+            "dropped_index": df.index[dropped],
+            "dropped_title": titles[dropped],
+            "similarity": jaccard_similarity(
+                [texts[i] for i in keeper[dropped]], [texts[i] for i in dropped]
+            ),
+        }
+    )
+    return df.drop(index=df.index[dropped]), report
+
+
 def _clamp_rating(df: pd.DataFrame) -> pd.DataFrame:
     rating_col = "vote_average" if "vote_average" in df.columns else "rating"
     if rating_col not in df.columns:
@@ -91,10 +154,17 @@ def _build_combined_text(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    cleaned, _ = clean_data_with_report(df)
+    return cleaned
+
+
+def clean_data_with_report(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Như clean_data, kèm report các dòng bị gộp do gần trùng."""
     cleaned = _fill_missing(df)
     cleaned = _drop_duplicates(cleaned)
     cleaned = _clamp_rating(cleaned)
     cleaned = _build_combined_text(cleaned)
+    cleaned, dedup_report = _drop_near_duplicates(cleaned)
 
     if "release_date" in cleaned.columns:
         cleaned["release_date"] = pd.to_datetime(cleaned["release_date"], errors="coerce")
@@ -105,4 +175,4 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
         cleaned["year"] = cleaned["year"].fillna(cleaned["year"].median())
 
     cleaned.reset_index(drop=True, inplace=True)
-    return cleaned
+    return cleaned, dedup_report
@@ -3,10 +3,11 @@ from __future__ import annotations
 from pathlib import Path
 import pandas as pd
 
-from models.data_cleaner import clean_data
+from models.data_cleaner import clean_data_with_report
 
 RAW_PATH = Path("data/raw/movies.csv")
 PROCESSED_PATH = Path("data/processed/cleaned_movies.csv")
+DEDUP_REPORT_PATH = Path("data/processed/dedup_report.csv")
 
 
 def load_raw_data() -> pd.DataFrame:
@@ -38,6 +39,8 @@ def ensure_processed_data() -> pd.DataFrame:
         return processed
 
     raw = load_raw_data()
-    processed = clean_data(raw)
+    processed, dedup_report = clean_data_with_report(raw)
     save_processed_data(processed)
+    # Audit các dòng bị gộp do gần trùng
+    dedup_report.to_csv(DEDUP_REPORT_PATH, index=False)
     return processed
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_EMPTY = np.uint32(0xFFFFFFFF)
+
+
+def shingle_hashes(texts: list[str], k: int = 3) -> tuple[np.ndarray, np.ndarray]:
+    """Hash các shingle k từ liên tiếp của mỗi văn bản.
+
+    Trả về (hashes, offsets): shingle của văn bản i nằm trong
+    hashes[offsets[i]:offsets[i + 1]]. Văn bản ngắn hơn k từ có một shingle
+    duy nhất gồm toàn bộ các từ.
+    """
+    tokens = [str(t).split() for t in texts]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    flat = [w for doc in tokens for w in doc]
+    codes = pd.factorize(pd.Series(flat, dtype=object))[0].astype(np.uint64) + np.uint64(1)
+
+    doc_starts = np.cumsum(lengths) - lengths
+    pos_in_doc = np.arange(len(codes)) - np.repeat(doc_starts, lengths)
+    doc_len = np.repeat(lengths, lengths)
+    # Vị trí bắt đầu shingle: đủ k từ, hoặc vị trí 0 của văn bản ngắn
+    starts = np.flatnonzero((pos_in_doc <= doc_len - k) | ((pos_in_doc == 0) & (doc_len < k)))
+
+    padded = np.concatenate([codes, np.zeros(k, dtype=np.uint64)])
+    hashes = np.zeros(len(starts), dtype=np.uint64)
+    for j in range(k):
+        # Từ thứ j của shingle, bằng 0 nếu vượt quá cuối văn bản ngắn
+        inside = (pos_in_doc[starts] + j) < doc_len[starts]
+        hashes = hashes * np.uint64(0x100000001B3) + np.where(inside, padded[starts + j], 0)
+    hashes = (hashes ^ (hashes >> np.uint64(32))) & _MASK32
+
+    shingle_counts = np.bincount(np.repeat(np.arange(len(tokens)), lengths)[starts], minlength=len(tokens))
+    offsets = np.concatenate([[0], np.cumsum(shingle_counts)])
+    return hashes, offsets
+
+
+def minhash_signatures(
+    hashes: np.ndarray,
+    offsets: np.ndarray,
+    num_perm: int = 128,
+    seed: int = 0,
+    max_block: int = 2_000_000,
+) -> np.ndarray:
+    """Chữ ký MinHash (n_docs x num_perm, uint32) bằng multiply-shift hashing.
+
+    Tính theo khối shingle để giới hạn bộ nhớ; min theo từng văn bản dùng
+    np.minimum.reduceat. Văn bản không có shingle nhận chữ ký toàn 0xFFFFFFFF.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    n_docs = len(offsets) - 1
+    signatures = np.full((n_docs, num_perm), _EMPTY, dtype=np.uint32)
+    counts = np.diff(offsets)
+
+    doc = 0
+    while doc < n_docs:
+        # Gom các văn bản liên tiếp sao cho số shingle không vượt max_block
+        stop = max(doc + 1, int(np.searchsorted(offsets, offsets[doc] + max_block, side="right")) - 1)
+        stop = min(stop, n_docs)
+        block_docs = np.arange(doc, stop)[counts[doc:stop] > 0]
+        if len(block_docs):
+            x = hashes[offsets[doc]:offsets[stop]]
+            seg = offsets[block_docs] - offsets[doc]
+            for p in range(num_perm):
+                h = ((a[p] * x + b[p]) >> np.uint64(32)).astype(np.uint32)
+                signatures[block_docs, p] = np.minimum.reduceat(h, seg)
+        doc = stop
+    return signatures
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = 16) -> np.ndarray:
+    """Cặp ứng viên (i, j) có chung bucket ở ít nhất một band.
+
+    Mỗi band được hash thành một số uint64 rồi sort; các văn bản liên tiếp
+    trong cùng bucket được nối thành cặp (chuỗi), nên số cặp tuyến tính theo
+    kích thước bucket thay vì bình phương.
+    """
+    n_docs, num_perm = signatures.shape
+    rows = num_perm // bands
+    valid = np.flatnonzero(signatures[:, 0] != _EMPTY)
+    mixer = np.random.default_rng(1).integers(1, 2**63, size=rows, dtype=np.uint64) | np.uint64(1)
+
+    pairs = []
+    for band in range(bands):
+        block = signatures[valid, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (block * mixer).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        same = keys[order][1:] == keys[order][:-1]
+        pairs.append(np.stack([valid[order][:-1][same], valid[order][1:][same]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def jaccard_similarity(left: list[str], right: list[str], k: int = 3) -> np.ndarray:
+    """Jaccard chính xác giữa tập shingle của left[i] và right[i] (dùng cho số ít cặp)."""
+    hashes, offsets = shingle_hashes(list(left) + list(right), k=k)
+    n = len(left)
+    similarity = np.ones(n)
+    for i in range(n):
+        a = set(hashes[offsets[i]:offsets[i + 1]].tolist())
+        b = set(hashes[offsets[n + i]:offsets[n + i + 1]].tolist())
+        if a or b:
+            similarity[i] = len(a & b) / len(a | b)
+    return similarity
+
+
+def find_near_duplicates(
+    texts: list[str],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int = 16,
+    shingle_size: int = 3,
+    accept: Callable[[np.ndarray, np.ndarray], np.ndarray] | None = None,
+) -> tuple[np.ndarray, pd.DataFrame]:
+    """Gom cụm các văn bản có Jaccard (ước lượng MinHash) >= threshold.
+
+    `accept(left, right)` (tùy chọn) trả về mask bool để loại thêm các cặp đã
+    qua ngưỡng, vd. khác năm phát hành. Trả về (cluster_labels, pairs): nhãn
+    cụm cho từng văn bản và bảng các cặp đã được xác nhận (left, right, similarity).
+    """
+    hashes, offsets = shingle_hashes(texts, k=shingle_size)
+    signatures = minhash_signatures(hashes, offsets, num_perm=num_perm)
+    candidates = lsh_candidate_pairs(signatures, bands=bands)
+
+    if len(candidates):
+        similarity = (signatures[candidates[:, 0]] == signatures[candidates[:, 1]]).mean(axis=1)
+        keep = similarity >= threshold
+        candidates, similarity = candidates[keep], similarity[keep]
+    else:
+        similarity = np.empty(0)
+    if accept is not None and len(candidates):
+        keep = np.asarray(accept(candidates[:, 0], candidates[:, 1]), dtype=bool)
+        candidates, similarity = candidates[keep], similarity[keep]
+
+    n_docs = len(texts)
+    graph = sparse.coo_matrix(
+        (np.ones(len(candidates)), (candidates[:, 0], candidates[:, 1])),
+        shape=(n_docs, n_docs),
+    )
+    _, labels = connected_components(graph, directed=False)
+    pairs = pd.DataFrame({"left": candidates[:, 0], "right": candidates[:, 1], "similarity": similarity})
+    return labels, pairs
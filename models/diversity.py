@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def mmr_select(relevance: np.ndarray, vectors, k: int, diversity: float) -> np.ndarray:
+    """Maximal marginal relevance: chọn tham lam k ứng viên vừa liên quan vừa đa dạng.
+
+    Mỗi bước chọn argmax của (1 - diversity) * relevance - diversity * max_sim,
+    trong đó max_sim là cosine lớn nhất với các phần tử đã chọn. `vectors` là
+    ma trận CSR (M x n_features, đã chuẩn hóa L2) của các ứng viên; chỉ k dòng
+    của khối tương đồng M x M thực sự được dùng nên mỗi dòng được tính khi
+    cần bằng một phép nhân ma trận-vector, rồi gộp vào max_sim bằng np.maximum.
+    Trả về vị trí (trong mảng ứng viên) theo thứ tự được chọn.
+    """
+    k = min(k, len(relevance))
+    top = relevance.max() if len(relevance) else 0.0
+    relevance = relevance / top if top > 0 else relevance
+    gain = (1.0 - diversity) * relevance
+    max_sim = np.zeros(len(relevance))
+    available = np.ones(len(relevance), dtype=bool)
+    chosen = np.empty(k, dtype=np.int64)
+    dense = np.zeros(vectors.shape[1])
+    for step in range(k):
+        score = np.where(available, gain - diversity * max_sim, -np.inf)
+        best = int(np.argmax(score))
+        chosen[step] = best
+        available[best] = False
+
+        start, stop = vectors.indptr[best], vectors.indptr[best + 1]
+        cols = vectors.indices[start:stop]
+        dense[cols] = vectors.data[start:stop]
+        np.maximum(max_sim, vectors @ dense, out=max_sim)
+        dense[cols] = 0.0
+    return chosen
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+EMBEDDINGS_DIR = Path("data/processed/embeddings")
+
+
+def build_embeddings(matrix, n_components: int = 256, random_state: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """LSA: chiếu ma trận TF-IDF xuống không gian dense bằng TruncatedSVD.
+
+    Trả về (components, vectors) - components dùng để chiếu query,
+    vectors là embedding đã chuẩn hóa L2 của từng document.
+    """
+    n_components = max(1, min(n_components, matrix.shape[1] - 1, matrix.shape[0] - 1))
+    svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+    vectors = svd.fit_transform(matrix).astype(np.float32)
+    return svd.components_.astype(np.float32), _l2_normalize(vectors)
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Lượng tử hóa int8 đối xứng với scale riêng cho từng dòng."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def tfidf_fingerprint(vectorizer, matrix) -> str:
+    """Hash của vocabulary, idf và số term của từng dòng trong ma trận TF-IDF.
+
+    Embedding chỉ dùng lại được khi được build từ đúng TF-IDF này - cùng kích
+    thước thôi là chưa đủ (vd. catalogue đổi phim nhưng giữ nguyên số dòng).
+    """
+    digest = hashlib.sha1()
+    digest.update("\n".join(map(str, vectorizer.get_feature_names_out())).encode("utf-8"))
+    digest.update(np.asarray(vectorizer.idf_, dtype=np.float64).tobytes())
+    digest.update(np.asarray(matrix.shape, dtype=np.int64).tobytes())
+    digest.update(np.asarray(matrix.indptr, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def save_embeddings(components: np.ndarray, vectors: np.ndarray, fingerprint: str, path: Path = EMBEDDINGS_DIR) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    quantized, scales = quantize_int8(vectors)
+    np.save(path / "components.npy", components)
+    np.save(path / "vectors_int8.npy", quantized)
+    np.save(path / "scales.npy", scales)
+    meta = {
+        "n_docs": int(vectors.shape[0]),
+        "n_features": int(components.shape[1]),
+        "dim": int(vectors.shape[1]),
+        "fingerprint": fingerprint,
+    }
+    (path / "meta.json").write_text(json.dumps(meta))
+
+
+def load_embeddings(fingerprint: str, path: Path = EMBEDDINGS_DIR) -> DenseIndex | None:
+    """Đọc index dense (memory-mapped); None nếu chưa build hoặc fingerprint TF-IDF không khớp."""
+    meta_path = path / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    if meta.get("fingerprint") != fingerprint:
+        return None
+    return DenseIndex(
+        components=np.load(path / "components.npy"),
+        vectors=np.load(path / "vectors_int8.npy", mmap_mode="r"),
+        scales=np.load(path / "scales.npy"),
+    )
+
+
+def ensure_embeddings(vectorizer, matrix, n_components: int = 256, path: Path = EMBEDDINGS_DIR) -> DenseIndex:
+    fingerprint = tfidf_fingerprint(vectorizer, matrix)
+    index = load_embeddings(fingerprint, path)
+    if index is not None:
+        return index
+
+    components, vectors = build_embeddings(matrix, n_components=n_components)
+    save_embeddings(components, vectors, fingerprint, path)
+    return load_embeddings(fingerprint, path)
+
+
+class DenseIndex:
+    """Embedding int8 (memory-mapped) + scale theo dòng, chấm điểm bằng dot product theo block."""
+
+    def __init__(self, components: np.ndarray, vectors: np.ndarray, scales: np.ndarray, block_size: int = 65536):
+        self.components = components
+        self.vectors = vectors
+        self.scales = scales
+        self.block_size = block_size
+
+    def encode_query(self, query_vec) -> np.ndarray:
+        """Chiếu vector TF-IDF (sparse, 1 x n_features) sang không gian LSA."""
+        dense = np.asarray(query_vec @ self.components.T, dtype=np.float32).ravel()
+        return _l2_normalize(dense[None, :])[0]
+
+    def score(self, query_vec) -> np.ndarray:
+        """Cosine similarity giữa query và mọi document."""
+        return self._score_encoded(self.encode_query(query_vec))
+
+    def top_k(self, query_vec, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """(indices, scores) của k document gần nhất, điểm giảm dần.
+
+        Query không có term nào trong vocabulary cho vector 0 - khi đó mọi điểm
+        đều bằng 0 và không có thứ hạng thật, nên trả về rỗng.
+        """
+        q = self.encode_query(query_vec)
+        if not q.any():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self._score_encoded(q)
+        k = max(1, min(k, len(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
+
+    def _score_encoded(self, q: np.ndarray) -> np.ndarray:
+        scores = np.empty(self.vectors.shape[0], dtype=np.float32)
+        for start in range(0, self.vectors.shape[0], self.block_size):
+            stop = start + self.block_size
+            block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+            scores[start:stop] = (block @ q) * self.scales[start:stop]
+        return scores
+
+
+def reciprocal_rank_fusion(rankings: list[np.ndarray], k: int = 60) -> dict[int, float]:
+    """Gộp nhiều danh sách xếp hạng: score(d) = sum 1 / (k + rank_d)."""
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, start=1):
+            fused[int(idx)] = fused.get(int(idx), 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
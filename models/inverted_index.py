@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy import sparse
+
+
+class InvertedIndex:
+    """Posting list theo từng term (CSC) của ma trận TF-IDF, chấm điểm top-k kiểu MaxScore.
+
+    Chỉ duyệt posting list của các term có trong query thay vì nhân với toàn
+    bộ ma trận. Term được xử lý theo upper bound giảm dần (w_t * max tf-idf
+    của term); khi tổng upper bound của các term còn lại nhỏ hơn điểm thứ k
+    hiện tại, document chưa được chạm tới không thể vào top-k nữa, nên các
+    term còn lại chỉ được tính cho tập ứng viên (truy cập theo dòng CSR).
+    Kết quả top-k giống hệt quét toàn bộ (trừ thứ tự giữa các điểm bằng nhau),
+    nhưng không chứa document điểm 0.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = sparse.csr_matrix(matrix)
+        self.postings = self.matrix.tocsc()
+        self.postings.sort_indices()
+        self.n_docs = self.matrix.shape[0]
+        # Upper bound của từng term: giá trị tf-idf lớn nhất trong cột
+        self.term_max = np.asarray(self.postings.max(axis=0).todense()).ravel()
+
+    def top_k(self, query_vec, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Trả về (indices, scores) của tối đa k document tốt nhất, điểm giảm dần.
+
+        Chỉ gồm document có chung ít nhất một term với query (điểm > 0), nên có
+        thể ít hơn k phần tử (hoặc rỗng) khi query khớp ít document.
+        """
+        k = max(1, min(k, self.n_docs))
+        query_vec = sparse.csr_matrix(query_vec)
+        terms = query_vec.indices
+        weights = query_vec.data
+        upper = weights * self.term_max[terms]
+        keep = upper > 0
+        terms, weights, upper = terms[keep], weights[keep], upper[keep]
+
+        order = np.argsort(-upper, kind="stable")
+        terms, weights, upper = terms[order], weights[order], upper[order]
+        remaining = np.concatenate([np.cumsum(upper[::-1])[::-1][1:], [0.0]])
+
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        touched = np.zeros(self.n_docs, dtype=bool)
+        hit = np.empty(0, dtype=np.int64)
+        candidates = None
+        for i, (term, weight) in enumerate(zip(terms, weights)):
+            start, stop = self.postings.indptr[term], self.postings.indptr[term + 1]
+            rows = self.postings.indices[start:stop]
+            # rows không trùng trong một cột nên += theo fancy index là đúng
+            scores[rows] += weight * self.postings.data[start:stop]
+            new_rows = rows[~touched[rows]]
+            touched[new_rows] = True
+            hit = np.concatenate([hit, new_rows])
+
+            rest = remaining[i]
+            if rest == 0:
+                break
+            if len(hit) < k:
+                continue
+            threshold = np.partition(scores[hit], len(hit) - k)[len(hit) - k]
+            if rest < threshold:
+                # MaxScore: chỉ ứng viên còn khả năng vượt ngưỡng mới cần các term còn lại
+                candidates = hit[scores[hit] + rest >= threshold]
+                rest_terms = terms[i + 1:]
+                rest_query = np.zeros(self.matrix.shape[1], dtype=np.float64)
+                rest_query[rest_terms] = weights[i + 1:]
+                scores[candidates] += self.matrix[candidates] @ rest_query
+                break
+
+        if candidates is None:
+            candidates = hit
+
+        cand_scores = scores[candidates]
+        if len(candidates) > k:
+            part = np.argpartition(-cand_scores, k - 1)[:k]
+            candidates, cand_scores = candidates[part], cand_scores[part]
+        order = np.lexsort((candidates, -cand_scores))
+        return candidates[order], cand_scores[order]
@@ -2,23 +2,81 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import linear_kernel
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from models.diversity import mmr_select
+from models.embeddings import DenseIndex, reciprocal_rank_fusion
+from models.inverted_index import InvertedIndex
+from models.vectorizer import QueryEncoder
+
+RETRIEVAL_MODES = ("tfidf", "semantic", "hybrid")
+# Số ứng viên đưa vào MMR khi bật diversity
+MMR_CANDIDATES = 200
+RESULT_FIELDS = ("id", "title", "overview", "genres", "rating", "release_date", "year", "score")
+
 
 class ContentRecommender:
-    def __init__(self, df: pd.DataFrame, vectorizer: TfidfVectorizer, matrix):
+    def __init__(self, df: pd.DataFrame, vectorizer: TfidfVectorizer, matrix, dense_index: DenseIndex | None = None):
         self.df = df
         self.vectorizer = vectorizer
         self.matrix = matrix
+        self.dense_index = dense_index
+        self.inverted_index = InvertedIndex(matrix)
+        self.query_encoder = QueryEncoder(vectorizer)
+
+    def recommend_by_query(self, query_vec, top_k: int = 10, mode: str = "tfidf", diversity: float = 0.0):
+        top_indices, top_scores = self.rank(query_vec, top_k=top_k, mode=mode, diversity=diversity)
+        return self.build_results(top_indices, top_scores)
+
+    def rank(self, query_vec, top_k: int = 10, mode: str = "tfidf", diversity: float = 0.0):
+        """Trả về (indices, scores) của top-k document, chưa dựng kết quả.
+
+        `diversity` > 0 bật re-rank MMR trên top MMR_CANDIDATES ứng viên
+        (0 = chỉ theo độ liên quan, 1 = ưu tiên đa dạng tối đa).
+        """
+        if not 0.0 <= diversity <= 1.0:
+            raise ValueError("diversity phải nằm trong [0, 1]")
+        if diversity == 0:
+            return self._retrieve(query_vec, top_k, mode)
+
+        candidates, scores = self._retrieve(query_vec, max(top_k, MMR_CANDIDATES), mode)
+        chosen = mmr_select(np.asarray(scores, dtype=np.float64), self.matrix[candidates], top_k, diversity)
+        return candidates[chosen], scores[chosen]
+
+    def _retrieve(self, query_vec, top_k: int, mode: str):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Chế độ tìm kiếm không hợp lệ: {mode}")
+        if mode != "tfidf" and self.dense_index is None:
+            raise ValueError(f"Chế độ '{mode}' cần dense index (chưa được build)")
+
+        if mode == "tfidf":
+            # Chỉ duyệt posting list của các term trong query
+            top_indices, top_scores = self.inverted_index.top_k(query_vec, top_k)
+        elif mode == "semantic":
+            top_indices, top_scores = self.dense_index.top_k(query_vec, top_k)
+        else:
+            top_indices, top_scores = self._hybrid_top_k(query_vec, top_k)
+        return top_indices, top_scores
+
+    def _hybrid_top_k(self, query_vec, top_k: int, depth: int = 100):
+        """Reciprocal rank fusion giữa TF-IDF và LSA trên top `depth` của mỗi bên.
+
+        Chỉ document thật sự khớp mới được xếp hạng: phía TF-IDF bỏ điểm 0,
+        phía LSA rỗng khi vector query bằng 0.
+        """
+        depth = min(max(depth, top_k), self.matrix.shape[0])
+        sparse_top, sparse_scores = self.inverted_index.top_k(query_vec, depth)
+        sparse_top = sparse_top[sparse_scores > 0]
+        dense_top, _ = self.dense_index.top_k(query_vec, depth)
 
-    def recommend_by_query(self, query_vec, top_k: int = 10):
-        similarities = linear_kernel(query_vec, self.matrix).flatten()
-        top_k = max(1, min(top_k, len(similarities)))
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        fused = reciprocal_rank_fusion([sparse_top, dense_top])
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:max(1, top_k)]
+        return np.array([idx for idx, _ in ranked], dtype=np.int64), np.array([score for _, score in ranked], dtype=np.float64)
 
+    def build_results(self, top_indices, top_scores, fields: tuple[str, ...] = RESULT_FIELDS):
+        """Dựng danh sách kết quả, chỉ giữ các trường trong `fields`."""
         results = []
-        for idx in top_indices:
+        for idx, score in zip(top_indices, top_scores):
             row = self.df.iloc[idx]
             rating_col = "vote_average" if "vote_average" in row else "rating"
             title = row.get("original_title", row.get("title", ""))
@@ -32,16 +90,15 @@ class ContentRecommender:
                     safe_id = int(raw_id)
                 except (TypeError, ValueError):
                     safe_id = int(idx)
-            results.append(
-                {
-                    "id": safe_id,
-                    "title": title,
-                    "overview": row.get("overview", row.get("description", "")),
-                    "genres": genres,
-                    "rating": float(row.get(rating_col, 0)),
-                    "release_date": str(row.get("release_date", "")),
-                    "year": int(row.get("year", 0)) if not pd.isna(row.get("year", np.nan)) else None,
-                    "score": float(similarities[idx]),
-                }
-            )
+            item = {
+                "id": safe_id,
+                "title": title,
+                "overview": row.get("overview", row.get("description", "")) if "overview" in fields else None,
+                "genres": genres,
+                "rating": float(row.get(rating_col, 0)),
+                "release_date": str(row.get("release_date", "")),
+                "year": int(row.get("year", 0)) if not pd.isna(row.get("year", np.nan)) else None,
+                "score": float(score),
+            }
+            results.append({field: item[field] for field in fields})
         return results
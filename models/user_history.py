@@ -2,9 +2,77 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Any
-from sqlalchemy import desc
+from sqlalchemy import delete, desc, inspect, select
 
 from models.database import get_session, SearchHistory, ViewHistory
+from models.ttl_cache import TTLCache
+
+MAX_SEARCHES = 50
+MAX_VIEWS = 30
+
+# Cache đọc lịch sử theo (user_id, limit), dùng chung cho mọi UserHistory trong process
+history_cache = TTLCache(max_entries=1024, ttl=30.0)
+
+UPSERT_INDEX = "uq_view_history_user_movie"
+# database URL -> bảng view_history đã có index unique hay chưa
+_upsert_supported: dict[str, bool] = {}
+
+
+def _trim(session, model, user_id: str, keep: int) -> None:
+    """Giữ lại `keep` bản ghi mới nhất của user bằng một câu DELETE duy nhất."""
+    latest_ids = (
+        select(model.id)
+        .where(model.user_id == user_id)
+        .order_by(desc(model.timestamp))
+        .limit(keep)
+    )
+    session.execute(
+        delete(model)
+        .where(model.user_id == user_id, model.id.not_in(latest_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _has_upsert_index(bind) -> bool:
+    """ON CONFLICT cần index unique (user_id, movie_id); database cũ chưa migrate thì không có."""
+    key = str(bind.url)
+    if key not in _upsert_supported:
+        indexes = inspect(bind).get_indexes(ViewHistory.__tablename__)
+        _upsert_supported[key] = any(ix["name"] == UPSERT_INDEX and ix["unique"] for ix in indexes)
+    return _upsert_supported[key]
+
+
+def _upsert_view(session, values: dict[str, Any]) -> None:
+    """INSERT ... ON CONFLICT (user_id, movie_id) DO UPDATE nếu dialect và schema hỗ trợ."""
+    bind = session.get_bind()
+    dialect = bind.dialect.name
+    if dialect in ("postgresql", "sqlite") and _has_upsert_index(bind):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(ViewHistory).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ViewHistory.user_id, ViewHistory.movie_id],
+            set_={
+                "title": stmt.excluded.title,
+                "genres": stmt.excluded.genres,
+                "rating": stmt.excluded.rating,
+                "timestamp": stmt.excluded.timestamp,
+            },
+        )
+        session.execute(stmt)
+        return
+
+    # Dialect khác (vd. SQL Server) hoặc database chưa chạy
+    # scripts/migrate_history_indexes.py: xóa rồi thêm trong cùng transaction
+    session.execute(
+        delete(ViewHistory).where(
+            ViewHistory.user_id == values["user_id"],
+            ViewHistory.movie_id == values["movie_id"],
+        )
+    )
+    session.add(ViewHistory(**values))
 
 
 class UserHistory:
@@ -25,55 +93,37 @@ class UserHistory:
                 timestamp=datetime.now()
             )
             session.add(search)
-            session.commit()
-            
+            session.flush()
+
             # Giữ 50 tìm kiếm gần nhất, xóa cũ hơn
-            old_searches = (
-                session.query(SearchHistory)
-                .filter(SearchHistory.user_id == self.user_id)
-                .order_by(desc(SearchHistory.timestamp))
-                .offset(50)
-                .all()
-            )
-            for old in old_searches:
-                session.delete(old)
+            _trim(session, SearchHistory, self.user_id, MAX_SEARCHES)
             session.commit()
         finally:
+            history_cache.invalidate(lambda key: key[0] == self.user_id)
             session.close()
 
     def add_view(self, movie_id: int | str, title: str, genres: str, rating: float) -> None:
         """Thêm một phim đã xem vào lịch sử."""
         session = get_session()
         try:
-            # Xóa bản ghi cũ của phim này nếu có (để cập nhật timestamp)
-            session.query(ViewHistory).filter(
-                ViewHistory.user_id == self.user_id,
-                ViewHistory.movie_id == str(movie_id)
-            ).delete()
-            
-            view = ViewHistory(
-                user_id=self.user_id,
-                movie_id=str(movie_id),
-                title=title,
-                genres=genres,
-                rating=rating,
-                timestamp=datetime.now()
+            # Upsert theo (user_id, movie_id) để cập nhật timestamp nếu đã xem
+            _upsert_view(
+                session,
+                {
+                    "user_id": self.user_id,
+                    "movie_id": str(movie_id),
+                    "title": title,
+                    "genres": genres,
+                    "rating": rating,
+                    "timestamp": datetime.now(),
+                },
             )
-            session.add(view)
-            session.commit()
-            
+
             # Giữ 30 phim gần nhất
-            old_views = (
-                session.query(ViewHistory)
-                .filter(ViewHistory.user_id == self.user_id)
-                .order_by(desc(ViewHistory.timestamp))
-                .offset(30)
-                .all()
-            )
-            for old in old_views:
-                session.delete(old)
+            _trim(session, ViewHistory, self.user_id, MAX_VIEWS)
             session.commit()
         finally:
+            history_cache.invalidate(lambda key: key[0] == self.user_id)
             session.close()
 
     def get_searches(self, limit: int = 10) -> list[dict[str, Any]]:
@@ -123,6 +173,21 @@ class UserHistory:
         finally:
             session.close()
 
+    def get_recent(self, limit: int = 10) -> dict[str, list]:
+        """Lấy lịch sử gần nhất, ưu tiên đọc từ cache của user."""
+        cached = history_cache.get((self.user_id, limit))
+        if cached is not None:
+            return cached
+        # Lấy generation trước khi đọc: nếu có ghi + invalidate xen giữa thì
+        # kết quả có thể đã cũ và set sẽ bỏ qua thay vì cache nó 30 giây
+        generation = history_cache.generation()
+        recent = {
+            "searches": self.get_searches(limit=limit),
+            "views": self.get_views(limit=limit),
+        }
+        history_cache.set((self.user_id, limit), recent, generation=generation)
+        return recent
+
     def get_all_history(self) -> dict[str, list]:
         """Lấy toàn bộ lịch sử."""
         return {
@@ -142,5 +207,27 @@ class UserHistory:
             ).delete()
             session.commit()
         finally:
+            history_cache.invalidate(lambda key: key[0] == self.user_id)
             session.close()
 
+
+def trim_all_history() -> int:
+    """Cắt lịch sử của mọi user về giới hạn (dùng cho job định kỳ / migration).
+
+    Trả về số user đã xử lý.
+    """
+    session = get_session()
+    try:
+        user_ids = {
+            row[0] for row in session.execute(select(SearchHistory.user_id).distinct())
+        } | {
+            row[0] for row in session.execute(select(ViewHistory.user_id).distinct())
+        }
+        for user_id in user_ids:
+            _trim(session, SearchHistory, user_id, MAX_SEARCHES)
+            _trim(session, ViewHistory, user_id, MAX_VIEWS)
+        session.commit()
+        return len(user_ids)
+    finally:
+        history_cache.clear()
+        session.close()
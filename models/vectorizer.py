@@ -1,19 +1,202 @@
 from __future__ import annotations
 
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from numbers import Integral
 from typing import Iterable, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
 
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
 
-def build_vectorizer(corpus: Iterable[str], max_features: int = 6000) -> Tuple[TfidfVectorizer, object]:
-    vectorizer = TfidfVectorizer(
-        max_features=max_features,
-        ngram_range=(1, 2),
-        min_df=2,
-        stop_words="english",
-    )
+VECTORIZER_PARAMS = {
+    "ngram_range": (1, 2),
+    "min_df": 2,
+    "stop_words": "english",
+}
+
+
+def build_vectorizer(corpus: Iterable[str], max_features: int = 6000, n_jobs: int = 1) -> Tuple[TfidfVectorizer, object]:
+    """Fit TF-IDF trên corpus; `n_jobs` > 1 (hoặc -1 = mọi core) dùng bản song song."""
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1:
+        return build_vectorizer_parallel(corpus, max_features=max_features, n_jobs=n_jobs)
+
+    vectorizer = TfidfVectorizer(max_features=max_features, **VECTORIZER_PARAMS)
     matrix = vectorizer.fit_transform(corpus)
     return vectorizer, matrix
 
 
+def build_vectorizer_parallel(
+    corpus: Iterable[str],
+    max_features: int = 6000,
+    n_jobs: int = 2,
+    chunks_per_job: int = 1,
+) -> Tuple[TfidfVectorizer, object]:
+    """Fit TF-IDF song song bằng process pool, kết quả giống bản tuần tự.
+
+    Pass 1: mỗi chunk được tokenize một lần thành ma trận đếm với vocabulary
+    cục bộ; document frequency / term frequency của các chunk được gộp để
+    chọn vocabulary theo đúng quy tắc của sklearn (min_df/max_df, rồi
+    max_features theo tổng term frequency). Pass 2: mỗi chunk được ánh xạ
+    sang vocabulary chung, nhân idf, chuẩn hóa L2, rồi ghép các khối CSR.
+    """
+    docs = list(corpus)
+    n_chunks = max(1, min(len(docs), n_jobs * chunks_per_job))
+    bounds = np.linspace(0, len(docs), n_chunks + 1).astype(int)
+    chunks = [docs[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        counted = list(pool.map(_count_chunk, chunks))
+
+        uniq_terms, inverse = _merge_terms([terms for terms, _ in counted])
+        doc_freq = np.bincount(inverse, weights=np.concatenate([_doc_freq(X) for _, X in counted]))
+        term_freq = np.bincount(inverse, weights=np.concatenate([_term_freq(X) for _, X in counted]))
+        kept = _select_features(doc_freq.astype(np.int64), term_freq.astype(np.int64), len(docs), max_features)
+
+        vocabulary = {str(term): i for i, term in enumerate(uniq_terms[kept])}
+        global_index = np.full(len(uniq_terms), -1, dtype=np.int64)
+        global_index[kept] = np.arange(len(kept))
+
+        vectorizer = TfidfVectorizer(max_features=max_features, vocabulary=vocabulary, **VECTORIZER_PARAMS)
+        # Cùng công thức smooth idf với TfidfTransformer.fit
+        vectorizer.idf_ = np.log((len(docs) + 1) / (doc_freq[kept] + 1)) + 1.0
+
+        offsets = np.cumsum([0] + [len(terms) for terms, _ in counted])
+        jobs = [
+            (X, global_index[inverse[offsets[i]:offsets[i + 1]]], len(vocabulary), vectorizer.idf_)
+            for i, (_, X) in enumerate(counted)
+        ]
+        blocks = list(pool.map(_transform_chunk, jobs))
+
+    return vectorizer, sparse.vstack(blocks, format="csr")
+
+
+def _merge_terms(chunk_terms: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Như np.unique(..., return_inverse=True) nhưng dùng hash (nhanh hơn nhiều với chuỗi)."""
+    codes, uniques = pd.factorize(np.concatenate(chunk_terms))
+    order = np.argsort(uniques, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return np.asarray(uniques)[order], rank[codes]
+
+
+def _count_chunk(docs: list[str]):
+    """Đếm term của một chunk với vocabulary cục bộ (không lọc)."""
+    counter = CountVectorizer(ngram_range=VECTORIZER_PARAMS["ngram_range"], stop_words=VECTORIZER_PARAMS["stop_words"])
+    try:
+        X = counter.fit_transform(docs)
+    except ValueError:
+        # Chunk không có term nào (vd. toàn stop word)
+        return np.array([], dtype=object), sparse.csr_matrix((len(docs), 0), dtype=np.int64)
+    return counter.get_feature_names_out(), X
+
+
+def _doc_freq(X) -> np.ndarray:
+    return np.bincount(X.indices, minlength=X.shape[1])
+
+
+def _term_freq(X) -> np.ndarray:
+    return np.asarray(X.sum(axis=0)).ravel()
+
+
+def _transform_chunk(args):
+    """Ánh xạ cột cục bộ sang vocabulary chung rồi áp dụng tf-idf + chuẩn hóa L2."""
+    X, col_map, n_features, idf = args
+    X = X.tocoo()
+    keep = col_map[X.col] >= 0
+    counts = sparse.csr_matrix(
+        (X.data[keep], (X.row[keep], col_map[X.col[keep]])),
+        shape=(X.shape[0], n_features),
+    )
+    transformer = TfidfTransformer()
+    transformer.idf_ = idf
+    return transformer.transform(counts, copy=False)
+
+
+def _select_features(doc_freq: np.ndarray, term_freq: np.ndarray, n_docs: int, max_features: int | None) -> np.ndarray:
+    """Chỉ số term được giữ, theo CountVectorizer._limit_features (max_df mặc định = 1.0).
+
+    `doc_freq` / `term_freq` phải theo thứ tự term đã sort như vocabulary của sklearn.
+    """
+    min_df = VECTORIZER_PARAMS["min_df"]
+    min_count = min_df if isinstance(min_df, Integral) else min_df * n_docs
+
+    mask = (doc_freq >= min_count) & (doc_freq <= n_docs)
+    if max_features is not None and mask.sum() > max_features:
+        keep = (-term_freq[mask]).argsort()[:max_features]
+        new_mask = np.zeros(len(doc_freq), dtype=bool)
+        new_mask[np.where(mask)[0][keep]] = True
+        mask = new_mask
+    return np.flatnonzero(mask)
+
+
 def transform_query(vectorizer: TfidfVectorizer, query: str):
     return vectorizer.transform([query])
+
+
+class QueryEncoder:
+    """Encode query thành vector TF-IDF mà không qua pipeline analyzer của sklearn.
+
+    Regex token và tập stop word được compile sẵn, token được map sang id qua
+    dict, vector CSR được dựng trực tiếp. Kết quả giống `transform_query`
+    (sai khác làm tròn số thực) và được memoize theo query đã chuẩn hóa.
+    """
+
+    def __init__(self, vectorizer: TfidfVectorizer, cache_size: int = 4096):
+        if (
+            vectorizer.analyzer != "word"
+            or vectorizer.preprocessor is not None
+            or vectorizer.tokenizer is not None
+            or vectorizer.strip_accents is not None
+            or vectorizer.norm not in ("l2", None)
+        ):
+            raise ValueError("QueryEncoder chỉ hỗ trợ analyzer='word' mặc định của TfidfVectorizer")
+
+        self.vocabulary = {str(term): int(i) for term, i in vectorizer.vocabulary_.items()}
+        self.n_features = len(self.vocabulary)
+        self.idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(self.n_features)
+        self.lowercase = vectorizer.lowercase
+        self.token_re = re.compile(vectorizer.token_pattern)
+        self.stop_words = frozenset(vectorizer.get_stop_words() or ())
+        self.ngram_range = vectorizer.ngram_range
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.norm = vectorizer.norm
+        self._encode_cached = lru_cache(maxsize=cache_size)(self._encode)
+
+    def encode(self, query: str):
+        """Vector TF-IDF (CSR 1 x n_features) của query; không được sửa kết quả trả về."""
+        key = " ".join(query.lower().split()) if self.lowercase else " ".join(query.split())
+        return self._encode_cached(key)
+
+    def _tokens(self, text: str) -> list[str]:
+        tokens = [t for t in self.token_re.findall(text) if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        # Giống CountVectorizer._word_ngrams
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def _encode(self, text: str):
+        counts = Counter(
+            self.vocabulary[gram] for gram in self._tokens(text) if gram in self.vocabulary
+        )
+        indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+        data = np.fromiter((counts[i] for i in indices), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            data = np.log(data) + 1.0
+        data *= self.idf[indices]
+        if self.norm == "l2" and len(data):
+            data /= np.sqrt(np.dot(data, data))
+        return sparse.csr_matrix(
+            (data, indices, np.array([0, len(indices)], dtype=np.int32)),
+            shape=(1, self.n_features),
+        )
@@ -0,0 +1,143 @@
+"""Benchmark bảng lịch sử ở quy mô hàng triệu dòng.
+
+So sánh schema cũ (index đơn trên user_id) với schema mới (index ghép
+(user_id, timestamp DESC) + unique (user_id, movie_id)) trên một database
+SQLite tạm (hoặc DATABASE_URL nếu truyền --url).
+
+Chạy: python -m scripts.bench_history --rows 1000000 --users 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+
+from models.database import Base, LEGACY_INDEXES, SearchHistory, ViewHistory, get_engine
+
+
+def seed(engine, rows: int, users: int, chunk: int = 50_000) -> None:
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1)
+    for table, model in ((SearchHistory.__table__, SearchHistory), (ViewHistory.__table__, ViewHistory)):
+        for offset in range(0, rows, chunk):
+            n = min(chunk, rows - offset)
+            user_ids = rng.integers(0, users, size=n)
+            seconds = rng.integers(0, 365 * 24 * 3600, size=n)
+            if model is SearchHistory:
+                batch = [
+                    {
+                        "user_id": f"u{u}",
+                        "query": f"query {offset + i}",
+                        "top_k": 10,
+                        "result_count": 10,
+                        "timestamp": start + timedelta(seconds=int(s)),
+                    }
+                    for i, (u, s) in enumerate(zip(user_ids, seconds))
+                ]
+            else:
+                # movie_id duy nhất theo dòng để không vi phạm unique (user_id, movie_id)
+                batch = [
+                    {
+                        "user_id": f"u{u}",
+                        "movie_id": str(offset + i),
+                        "title": f"movie {offset + i}",
+                        "genres": "Drama",
+                        "rating": 7.0,
+                        "timestamp": start + timedelta(seconds=int(s)),
+                    }
+                    for i, (u, s) in enumerate(zip(user_ids, seconds))
+                ]
+            with engine.begin() as conn:
+                conn.execute(insert(table), batch)
+
+
+def use_legacy_indexes(engine) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(engine, checkfirst=True)
+    with engine.begin() as conn:
+        for name, table in zip(LEGACY_INDEXES, ("search_history", "view_history")):
+            conn.exec_driver_sql(f"CREATE INDEX {name} ON {table} (user_id)")
+
+
+def use_new_indexes(engine) -> None:
+    with engine.begin() as conn:
+        for name in LEGACY_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def time_calls(fn, user_ids: list[str]) -> float:
+    """Trả về thời gian trung bình (ms) mỗi lần gọi."""
+    t0 = time.perf_counter()
+    for user_id in user_ids:
+        fn(user_id)
+    return (time.perf_counter() - t0) * 1000 / len(user_ids)
+
+
+def run_reads(users: list[str]) -> dict[str, float]:
+    from models.user_history import UserHistory
+
+    return {
+        "get_searches": time_calls(lambda u: UserHistory(u).get_searches(limit=10), users),
+        "get_views": time_calls(lambda u: UserHistory(u).get_views(limit=10), users),
+    }
+
+
+def run_writes(users: list[str]) -> dict[str, float]:
+    from models.user_history import UserHistory
+
+    return {
+        "add_search": time_calls(lambda u: UserHistory(u).add_search("bench", 10, 10), users),
+        "add_view": time_calls(lambda u: UserHistory(u).add_view("bench", "Bench", "Drama", 7.0), users),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark user history tables")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows per history table")
+    parser.add_argument("--users", type=int, default=10_000, help="Number of distinct users")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per operation")
+    parser.add_argument("--url", type=str, default=None, help="Database URL (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    else:
+        tmp_dir = tempfile.mkdtemp()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench_history.db')}"
+
+    engine = get_engine()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    print(f"Seeding {args.rows} rows per table for {args.users} users...")
+    t0 = time.perf_counter()
+    seed(engine, args.rows, args.users)
+    print(f"Seeded in {time.perf_counter() - t0:.1f}s")
+
+    rng = np.random.default_rng(1)
+    users = [f"u{u}" for u in rng.integers(0, args.users, size=args.calls)]
+
+    use_legacy_indexes(engine)
+    legacy = run_reads(users)
+    use_new_indexes(engine)
+    composite = run_reads(users)
+    composite.update(run_writes(users))
+
+    print(f"{'operation':<14}{'legacy (ms)':>14}{'composite (ms)':>16}")
+    for name, value in composite.items():
+        before = f"{legacy[name]:.3f}" if name in legacy else "-"
+        print(f"{name:<14}{before:>14}{value:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
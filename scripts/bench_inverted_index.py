@@ -0,0 +1,71 @@
+"""Benchmark: quét toàn bộ ma trận (linear_kernel) vs inverted index MaxScore.
+
+Ma trận lớn được tạo bằng cách lặp lại các dòng TF-IDF thật cho tới đủ số
+document, nên phân bố posting list giống catalogue thật.
+Query ngắn: 2-3 từ ngẫu nhiên trong vocabulary; query dài: combined_text của phim.
+
+Chạy: python -m scripts.bench_inverted_index --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.metrics.pairwise import linear_kernel
+
+from models.data_loader import ensure_processed_data
+from models.inverted_index import InvertedIndex
+from models.vectorizer import build_vectorizer
+
+
+def replicate(matrix, n_docs: int):
+    reps = -(-n_docs // matrix.shape[0])
+    return sparse.vstack([matrix] * reps, format="csr")[:n_docs]
+
+
+def scan_top_k(query_vec, matrix, k: int) -> np.ndarray:
+    similarities = linear_kernel(query_vec, matrix).flatten()
+    return np.argsort(similarities)[::-1][:k]
+
+
+def time_queries(fn, queries) -> float:
+    """Thời gian trung bình (ms) mỗi query."""
+    t0 = time.perf_counter()
+    for qv in queries:
+        fn(qv)
+    return (time.perf_counter() - t0) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inverted-index top-k against a full scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Catalogue sizes")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per kind")
+    parser.add_argument("--k", type=int, default=10, help="Top-K")
+    args = parser.parse_args()
+
+    df = ensure_processed_data()
+    texts = df["combined_text"].astype(str).tolist()
+    vectorizer, base = build_vectorizer(texts)
+
+    rng = np.random.default_rng(0)
+    vocab = [t for t in vectorizer.get_feature_names_out() if " " not in t]
+    short = [" ".join(rng.choice(vocab, size=rng.integers(2, 4))) for _ in range(args.queries)]
+    long = [texts[i] for i in rng.choice(len(texts), size=args.queries, replace=False)]
+    kinds = {"short": vectorizer.transform(short), "long": vectorizer.transform(long)}
+
+    print(f"{'docs':>10}{'query':>8}{'scan (ms)':>12}{'inverted (ms)':>15}{'speedup':>10}")
+    for n_docs in args.sizes:
+        matrix = replicate(base, n_docs)
+        index = InvertedIndex(matrix)
+        for kind, query_vecs in kinds.items():
+            queries = [query_vecs[i] for i in range(query_vecs.shape[0])]
+            scan_ms = time_queries(lambda qv: scan_top_k(qv, matrix, args.k), queries)
+            inv_ms = time_queries(lambda qv: index.top_k(qv, args.k), queries)
+            print(f"{n_docs:>10}{kind:>8}{scan_ms:>12.3f}{inv_ms:>15.3f}{scan_ms / inv_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark độ trễ thêm vào của re-rank MMR (M ứng viên -> k kết quả).
+
+Chạy: python -m scripts.bench_mmr --candidates 200 --k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from models.data_loader import ensure_processed_data
+from models.diversity import mmr_select
+from models.inverted_index import InvertedIndex
+from models.vectorizer import QueryEncoder, build_vectorizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MMR diversification latency")
+    parser.add_argument("--candidates", type=int, default=200, help="Candidate set size M")
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 30], help="Result sizes")
+    parser.add_argument("--diversity", type=float, default=0.5, help="MMR diversity weight")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    args = parser.parse_args()
+
+    texts = ensure_processed_data()["combined_text"].astype(str).tolist()
+    vectorizer, matrix = build_vectorizer(texts)
+    index = InvertedIndex(matrix)
+    encoder = QueryEncoder(vectorizer)
+
+    rng = np.random.default_rng(0)
+    vocab = [t for t in vectorizer.get_feature_names_out() if " " not in t]
+    queries = [" ".join(rng.choice(vocab, size=rng.integers(1, 4))) for _ in range(args.queries)]
+    candidate_sets = [index.top_k(encoder.encode(q), args.candidates) for q in queries]
+
+    print(f"{'k':>4}{'median (ms)':>13}{'p95 (ms)':>10}")
+    for k in args.k:
+        timings = []
+        for candidates, scores in candidate_sets:
+            t0 = time.perf_counter()
+            mmr_select(scores, matrix[candidates], k, args.diversity)
+            timings.append((time.perf_counter() - t0) * 1000)
+        print(f"{k:>4}{np.median(timings):>13.3f}{np.percentile(timings, 95):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark encode query: transform_query (sklearn) vs QueryEncoder (không cache / có cache).
+
+Chạy: python -m scripts.bench_query_encoder --queries 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from models.data_loader import ensure_processed_data
+from models.vectorizer import QueryEncoder, build_vectorizer, transform_query
+
+
+def time_per_query(fn, queries: list[str]) -> float:
+    """Thời gian trung bình (µs) mỗi query."""
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t0) * 1e6 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query encoding")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries per kind")
+    args = parser.parse_args()
+
+    texts = ensure_processed_data()["combined_text"].astype(str).tolist()
+    vectorizer, _ = build_vectorizer(texts)
+
+    rng = np.random.default_rng(0)
+    vocab = [t for t in vectorizer.get_feature_names_out() if " " not in t]
+    kinds = {
+        "short": [" ".join(rng.choice(vocab, size=rng.integers(2, 4))) for _ in range(args.queries)],
+        "long": [texts[i] for i in rng.integers(0, len(texts), size=args.queries)],
+    }
+
+    reference = QueryEncoder(vectorizer, cache_size=0)
+    print(f"{'query':<8}{'sklearn (µs)':>14}{'encoder (µs)':>14}{'cached (µs)':>13}{'max |diff|':>12}")
+    for kind, queries in kinds.items():
+        diff = max(
+            abs(transform_query(vectorizer, q) - reference.encode(q)).max()
+            for q in queries[:100]
+        )
+        sklearn_us = time_per_query(lambda q: transform_query(vectorizer, q), queries)
+        # cache_size=0: đo riêng đường encode, không memoize
+        encoder_us = time_per_query(reference.encode, queries)
+        cached = QueryEncoder(vectorizer)
+        for q in queries:
+            cached.encode(q)
+        cached_us = time_per_query(cached.encode, queries)
+        print(f"{kind:<8}{sklearn_us:>14.1f}{encoder_us:>14.1f}{cached_us:>13.1f}{diff:>12.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark build TF-IDF tuần tự vs song song theo số core.
+
+Catalogue lớn được tạo bằng cách lặp lại combined_text thật tới đủ số dòng.
+Mỗi cấu hình song song được so với bản tuần tự: cùng vocabulary, cùng idf,
+ma trận chỉ lệch ở mức làm tròn số thực.
+
+Chạy: python -m scripts.bench_vectorizer --rows 1000000 --jobs 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from models.data_loader import ensure_processed_data
+from models.vectorizer import build_vectorizer
+
+
+def main():
+    default_jobs = sorted({2, 4, os.cpu_count() or 1} - {1})
+    parser = argparse.ArgumentParser(description="Benchmark parallel TF-IDF index build")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Catalogue size (replicated rows)")
+    parser.add_argument("--jobs", type=int, nargs="+", default=default_jobs, help="Worker counts to try")
+    args = parser.parse_args()
+
+    texts = ensure_processed_data()["combined_text"].astype(str).tolist()
+    reps = -(-args.rows // len(texts))
+    corpus = (texts * reps)[: args.rows]
+    print(f"{len(corpus)} documents, {os.cpu_count()} CPU cores available")
+
+    t0 = time.perf_counter()
+    serial_vec, serial_matrix = build_vectorizer(corpus)
+    serial_time = time.perf_counter() - t0
+
+    print(f"{'jobs':>6}{'time (s)':>12}{'speedup':>10}{'same vocab/idf':>16}{'max |diff|':>13}")
+    print(f"{1:>6}{serial_time:>12.2f}{1.0:>9.2f}x{'-':>16}{'-':>13}")
+    for n_jobs in args.jobs:
+        t0 = time.perf_counter()
+        vec, matrix = build_vectorizer(corpus, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - t0
+
+        same = vec.vocabulary_ == serial_vec.vocabulary_ and np.array_equal(vec.idf_, serial_vec.idf_)
+        diff = abs(matrix - serial_matrix).max()
+        print(f"{n_jobs:>6}{elapsed:>12.2f}{serial_time / elapsed:>9.2f}x{str(same):>16}{diff:>13.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Build offline dense embeddings (LSA) cho chế độ tìm kiếm semantic/hybrid.
+
+Chạy: python -m scripts.build_embeddings --dim 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from models.data_loader import ensure_processed_data
+from models.embeddings import EMBEDDINGS_DIR, build_embeddings, save_embeddings, tfidf_fingerprint
+from models.vectorizer import build_vectorizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build LSA embeddings from the TF-IDF matrix")
+    parser.add_argument("--dim", type=int, default=256, help="Number of SVD components")
+    args = parser.parse_args()
+
+    df = ensure_processed_data()
+    vectorizer, matrix = build_vectorizer(df["combined_text"].astype(str).tolist())
+
+    t0 = time.perf_counter()
+    components, vectors = build_embeddings(matrix, n_components=args.dim)
+    save_embeddings(components, vectors, tfidf_fingerprint(vectorizer, matrix))
+    print(f"Built {vectors.shape[0]} x {vectors.shape[1]} embeddings in {time.perf_counter() - t0:.1f}s")
+    print(f"Saved to {EMBEDDINGS_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import time
 import numpy as np
 import pandas as pd
 
 from models.data_loader import ensure_processed_data
 from models.vectorizer import build_vectorizer
-from models.recommender import ContentRecommender
+from models.embeddings import ensure_embeddings
+from models.recommender import ContentRecommender, RETRIEVAL_MODES
 from models import metrics
 
 
@@ -25,11 +27,18 @@ def baseline_rating_predictions(df: pd.DataFrame) -> tuple[list[float], list[flo
 def build_recommender(df: pd.DataFrame) -> ContentRecommender:
     texts = df["combined_text"].astype(str).tolist()
     vectorizer, matrix = build_vectorizer(texts)
-    return ContentRecommender(df=df, vectorizer=vectorizer, matrix=matrix)
+    dense_index = ensure_embeddings(vectorizer, matrix)
+    return ContentRecommender(df=df, vectorizer=vectorizer, matrix=matrix, dense_index=dense_index)
 
 
-def compute_precision_recall(df: pd.DataFrame, recommender: ContentRecommender, k: int, sample: int | None = None) -> tuple[float, float]:
-    """Evaluate Precision@K and Recall@K by genre-based relevance.
+def compute_precision_recall(
+    df: pd.DataFrame,
+    recommender: ContentRecommender,
+    k: int,
+    sample: int | None = None,
+    mode: str = "tfidf",
+) -> tuple[float, float, float]:
+    """Evaluate Precision@K, Recall@K and mean query latency (ms) by genre-based relevance.
 
     Relevance definition: items that share at least one genre with the query movie.
     For each movie i, use its own `combined_text` as a query to retrieve top-K similar movies.
@@ -52,6 +61,7 @@ def compute_precision_recall(df: pd.DataFrame, recommender: ContentRecommender,
 
     precision_list: list[float] = []
     recall_list: list[float] = []
+    latency_list: list[float] = []
 
     for i in indices:
         # Relevant set: items sharing at least one genre with i (excluding i)
@@ -61,7 +71,9 @@ def compute_precision_recall(df: pd.DataFrame, recommender: ContentRecommender,
 
         # Recommend by query for item i
         qv = query_vecs[i]
-        results = recommender.recommend_by_query(qv, top_k=k + 1)  # +1 to allow self
+        t0 = time.perf_counter()
+        results = recommender.recommend_by_query(qv, top_k=k + 1, mode=mode)  # +1 to allow self
+        latency_list.append((time.perf_counter() - t0) * 1000)
         # Filter out self item by title match
         rec_titles = [r["title"] for r in results if r["title"] != df.iloc[i][titles_col]][:k]
 
@@ -72,7 +84,8 @@ def compute_precision_recall(df: pd.DataFrame, recommender: ContentRecommender,
 
     precision = float(np.mean(precision_list)) if precision_list else 0.0
     recall = float(np.mean(recall_list)) if recall_list else 0.0
-    return precision, recall
+    latency = float(np.mean(latency_list)) if latency_list else 0.0
+    return precision, recall, latency
 
 
 
@@ -80,6 +93,7 @@ def main():
     parser = argparse.ArgumentParser(description="Evaluate recommender metrics")
     parser.add_argument("--k", type=int, default=10, help="Top-K for Precision/Recall")
     parser.add_argument("--sample", type=int, default=200, help="Number of items to sample for P/R evaluation (None for all)")
+    parser.add_argument("--modes", nargs="+", default=list(RETRIEVAL_MODES), choices=RETRIEVAL_MODES, help="Retrieval modes to compare")
     args = parser.parse_args()
 
     df = ensure_processed_data()
@@ -90,13 +104,14 @@ def main():
     mae_val = metrics.mae(actual, predicted)
     rmse_val = metrics.rmse(actual, predicted)
 
-    # Precision/Recall@K (genre-based relevance)
-    precision_k, recall_k = compute_precision_recall(df, recommender, k=args.k, sample=args.sample)
-
     print(f"MAE (baseline): {mae_val:.4f}")
     print(f"RMSE (baseline): {rmse_val:.4f}")
-    print(f"Precision@{args.k}: {precision_k:.4f}")
-    print(f"Recall@{args.k}: {recall_k:.4f}")
+
+    # Precision/Recall@K (genre-based relevance) + latency cho từng chế độ
+    print(f"{'mode':<10}{'Precision@' + str(args.k):>14}{'Recall@' + str(args.k):>12}{'latency (ms)':>14}")
+    for mode in args.modes:
+        precision_k, recall_k, latency = compute_precision_recall(df, recommender, k=args.k, sample=args.sample, mode=mode)
+        print(f"{mode:<10}{precision_k:>14.4f}{recall_k:>12.4f}{latency:>14.3f}")
 
 
 if __name__ == "__main__":
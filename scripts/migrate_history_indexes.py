@@ -0,0 +1,99 @@
+"""Nâng cấp index cho bảng search_history / view_history trên database đã có.
+
+Các bước (idempotent, chạy lại nhiều lần không sao):
+1. Gộp các bản ghi view_history trùng (user_id, movie_id), giữ bản mới nhất
+   - bắt buộc trước khi tạo index unique.
+2. Xóa index cũ chỉ trên user_id (đã được index ghép bao phủ).
+3. Tạo index ghép (user_id, timestamp DESC) và index unique (user_id, movie_id).
+4. (Tùy chọn --trim) Cắt lịch sử mọi user về giới hạn 50 / 30.
+
+Chạy: python -m scripts.migrate_history_indexes [--trim]
+"""
+
+from __future__ import annotations
+
+import argparse
+from sqlalchemy import and_, delete, exists, inspect
+from sqlalchemy.orm import aliased
+
+from models.database import Base, LEGACY_INDEXES, ViewHistory, init_db
+from models.user_history import trim_all_history
+
+
+def dedupe_views(engine) -> int:
+    """Xóa các bản ghi view cũ hơn của cùng (user_id, movie_id)."""
+    newer = aliased(ViewHistory)
+    stmt = delete(ViewHistory).where(
+        exists().where(
+            and_(
+                newer.user_id == ViewHistory.user_id,
+                newer.movie_id == ViewHistory.movie_id,
+                (newer.timestamp > ViewHistory.timestamp)
+                | and_(newer.timestamp == ViewHistory.timestamp, newer.id > ViewHistory.id),
+            )
+        )
+    )
+    with engine.begin() as conn:
+        return conn.execute(stmt).rowcount
+
+
+def drop_legacy_indexes(engine) -> list[str]:
+    inspector = inspect(engine)
+    dropped = []
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(_drop_index_sql(engine, table.name, name))
+                dropped.append(name)
+    return dropped
+
+
+def _drop_index_sql(engine, table_name: str, index_name: str) -> str:
+    if engine.dialect.name == "mssql":
+        return f"DROP INDEX {index_name} ON {table_name}"
+    return f"DROP INDEX {index_name}"
+
+
+def create_indexes(engine) -> list[str]:
+    created = []
+    existing = {
+        ix["name"]
+        for table in Base.metadata.sorted_tables
+        for ix in inspect(engine).get_indexes(table.name)
+    }
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+                created.append(index.name)
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate user history indexes")
+    parser.add_argument("--trim", action="store_true", help="Trim every user's history to the retention limits")
+    args = parser.parse_args()
+
+    # create_all chỉ tạo bảng còn thiếu, không đụng tới index của bảng đã có
+    engine = init_db()
+
+    removed = dedupe_views(engine)
+    print(f"Removed {removed} duplicate view rows")
+
+    for name in drop_legacy_indexes(engine):
+        print(f"Dropped legacy index {name}")
+
+    for name in create_indexes(engine):
+        print(f"Created index {name}")
+
+    if args.trim:
+        users = trim_all_history()
+        print(f"Trimmed history for {users} users")
+
+    print("Migration complete!")
+
+
+if __name__ == "__main__":
+    main()
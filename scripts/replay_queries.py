@@ -0,0 +1,197 @@
+"""Export query thật từ bảng search_history và replay lên một cấu hình retrieval.
+
+Export ra file JSONL nén gzip (mỗi dòng: query, top_k, timestamp):
+
+    python -m scripts.replay_queries export --out data/replay/queries.jsonl.gz --limit 10000
+
+Replay trong process hoặc qua HTTP, đo throughput / latency và lưu kết quả:
+
+    python -m scripts.replay_queries replay --queries data/replay/queries.jsonl.gz \\
+        --target inproc --mode tfidf --save data/replay/baseline.json
+    python -m scripts.replay_queries replay --queries data/replay/queries.jsonl.gz \\
+        --target http --url http://localhost:5000 --concurrency 8 --mode hybrid \\
+        --baseline data/replay/baseline.json
+
+Khi có --baseline, báo cáo thêm độ trùng kết quả (overlap@k) so với lần chạy gốc.
+Replay qua HTTP gửi header X-User-Id=replay nên lịch sử sinh ra tách biệt với user thật.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+
+from models.database import SearchHistory, get_session
+from models.recommender import RETRIEVAL_MODES
+
+REPLAY_USER_ID = "replay"
+
+
+def export_queries(out: Path, limit: int | None = None, user_id: str | None = None) -> int:
+    """Ghi các lần tìm kiếm (cũ -> mới) ra JSONL gzip; trả về số dòng."""
+    stmt = select(SearchHistory.query, SearchHistory.top_k, SearchHistory.timestamp).order_by(
+        SearchHistory.timestamp.desc()
+    )
+    if user_id is not None:
+        stmt = stmt.where(SearchHistory.user_id == user_id)
+    else:
+        stmt = stmt.where(SearchHistory.user_id != REPLAY_USER_ID)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    session = get_session()
+    try:
+        rows = list(session.execute(stmt))
+    finally:
+        session.close()
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(out, "wt", encoding="utf-8") as f:
+        for query, top_k, timestamp in reversed(rows):
+            f.write(json.dumps({"query": query, "top_k": top_k, "timestamp": timestamp.isoformat()}, ensure_ascii=False))
+            f.write("\n")
+    return len(rows)
+
+
+def load_queries(path: Path) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def make_inproc_runner(mode: str, diversity: float):
+    from scripts.evaluate import build_recommender
+    from models.data_loader import ensure_processed_data
+
+    recommender = build_recommender(ensure_processed_data())
+
+    def run(item: dict) -> list[int]:
+        query_vec = recommender.query_encoder.encode(item["query"])
+        indices, scores = recommender.rank(query_vec, top_k=item["top_k"], mode=mode, diversity=diversity)
+        return [r["id"] for r in recommender.build_results(indices, scores, fields=("id",))]
+
+    return run
+
+
+def make_http_runner(url: str, mode: str, diversity: float, timeout: float):
+    endpoint = url.rstrip("/") + "/api/recommend"
+
+    def run(item: dict) -> list[int]:
+        body = json.dumps(
+            {"query": item["query"], "top_k": item["top_k"], "mode": mode, "diversity": diversity, "fields": ["id"]}
+        ).encode("utf-8")
+        req = urllib.request.Request(
+            endpoint,
+            data=body,
+            headers={"Content-Type": "application/json", "X-User-Id": REPLAY_USER_ID},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return [r["id"] for r in json.loads(resp.read())["results"]]
+
+    return run
+
+
+def replay(run, queries: list[dict], concurrency: int) -> tuple[list[list[int]], np.ndarray, float]:
+    """Chạy mọi query; trả về (kết quả, latency ms từng query, tổng thời gian giây)."""
+
+    def timed(item):
+        t0 = time.perf_counter()
+        ids = run(item)
+        return ids, (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outputs = list(pool.map(timed, queries))
+    else:
+        outputs = [timed(item) for item in queries]
+    wall = time.perf_counter() - t0
+    return [ids for ids, _ in outputs], np.array([ms for _, ms in outputs]), wall
+
+
+def overlap_at_k(results: list[list[int]], baseline: list[list[int]]) -> float:
+    """Trung bình |A ∩ B| / max(|A|, |B|) giữa hai lần chạy trên cùng danh sách query."""
+    scores = [
+        len(set(a) & set(b)) / max(len(a), len(b))
+        for a, b in zip(results, baseline)
+        if a or b
+    ]
+    return float(np.mean(scores)) if scores else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and replay production queries from search_history")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Export search_history queries to a gzip JSONL file")
+    exp.add_argument("--out", type=Path, required=True, help="Output file (.jsonl.gz)")
+    exp.add_argument("--limit", type=int, default=None, help="Most recent N searches only")
+    exp.add_argument("--user", type=str, default=None, help="Only this user_id")
+
+    rep = sub.add_parser("replay", help="Replay exported queries against a retrieval configuration")
+    rep.add_argument("--queries", type=Path, required=True, help="Exported queries file")
+    rep.add_argument("--target", choices=["inproc", "http"], default="inproc", help="Where to send queries")
+    rep.add_argument("--url", type=str, default="http://localhost:5000", help="Server URL for --target http")
+    rep.add_argument("--mode", choices=RETRIEVAL_MODES, default="tfidf", help="Retrieval mode")
+    rep.add_argument("--diversity", type=float, default=0.0, help="MMR diversity (0-1)")
+    rep.add_argument("--concurrency", type=int, default=1, help="Concurrent requests")
+    rep.add_argument("--warmup", type=int, default=1, help="Untimed queries sent first (loads server artifacts/caches)")
+    rep.add_argument("--timeout", type=float, default=30.0, help="HTTP timeout (seconds)")
+    rep.add_argument("--baseline", type=Path, default=None, help="Previous run (--save) to compare results against")
+    rep.add_argument("--save", type=Path, default=None, help="Save this run's results as JSON")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        n = export_queries(args.out, limit=args.limit, user_id=args.user)
+        print(f"Exported {n} queries to {args.out}")
+        return
+
+    queries = load_queries(args.queries)
+    if not queries:
+        print("No queries to replay")
+        return
+
+    if args.target == "http":
+        run = make_http_runner(args.url, args.mode, args.diversity, args.timeout)
+    else:
+        run = make_inproc_runner(args.mode, args.diversity)
+
+    for item in queries[:args.warmup]:
+        run(item)
+    results, latencies, wall = replay(run, queries, args.concurrency)
+
+    print(f"Replayed {len(queries)} queries ({args.target}, mode={args.mode}, diversity={args.diversity}, concurrency={args.concurrency})")
+    print(f"Throughput: {len(queries) / wall:.1f} queries/s")
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"Latency (ms): p50={p50:.2f} p95={p95:.2f} p99={p99:.2f} max={latencies.max():.2f}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        if len(baseline["results"]) != len(results):
+            raise ValueError("Baseline được chạy trên danh sách query khác")
+        print(f"Overlap@k vs baseline: {overlap_at_k(results, baseline['results']):.4f}")
+
+    if args.save is not None:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(
+            json.dumps(
+                {
+                    "config": {"target": args.target, "mode": args.mode, "diversity": args.diversity},
+                    "latency_ms": latencies.round(3).tolist(),
+                    "results": results,
+                }
+            )
+        )
+        print(f"Saved run to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 const submitBtn = document.getElementById("submitBtn");
 const queryInput = document.getElementById("query");
 const topKInput = document.getElementById("top_k");
+const modeInput = document.getElementById("mode");
 const errorBox = document.getElementById("error");
 const resultsBox = document.getElementById("results");
 
@@ -22,7 +23,15 @@ async function fetchJson(url, options = {}) {
     return res.json();
 }
 
-function renderResults(items) {
+// Chế độ hybrid trả về điểm RRF (tổng 1 / (60 + rank)), không phải độ tương đồng
+function formatScore(score, mode) {
+    if (mode === "hybrid") {
+        return `Điểm kết hợp (RRF): ${score.toFixed(4)}`;
+    }
+    return `Độ tương đồng: ${(score * 100).toFixed(2)}%`;
+}
+
+function renderResults(items, mode) {
     resultsBox.innerHTML = "";
     if (!items.length) {
         resultsBox.innerHTML = "<p>Không tìm thấy gợi ý phù hợp.</p>";
@@ -39,7 +48,7 @@ function renderResults(items) {
             <div class="result-title">${item.title}</div>
             <div class="result-meta">${item.genres} • Rating: ${item.rating.toFixed(1)}/10${releaseYear ? " • " + releaseYear : ""}</div>
             <div class="result-overview">${overviewPreview}</div>
-            <div class="result-score">Độ tương đồng: ${(item.score * 100).toFixed(2)}%</div>
+            <div class="result-score">${formatScore(item.score, mode)}</div>
         `;
         // Thêm sự kiện click để lưu vào lịch sử xem
         div.addEventListener("click", () => {
@@ -55,6 +64,7 @@ async function handleRecommend() {
 
     const query = queryInput.value.trim();
     const top_k = Number(topKInput.value) || 10;
+    const mode = modeInput.value;
 
     if (!query) {
         errorBox.textContent = "Vui lòng nhập từ khóa.";
@@ -66,9 +76,9 @@ async function handleRecommend() {
         submitBtn.textContent = "Đang gợi ý...";
         const data = await fetchJson("/api/recommend", {
             method: "POST",
-            body: JSON.stringify({ query, top_k }),
+            body: JSON.stringify({ query, top_k, mode }),
         });
-        renderResults(data.results || []);
+        renderResults(data.results || [], mode);
     } catch (err) {
         errorBox.textContent = err.message;
     } finally {